@@ -10,32 +10,138 @@ Requested by: Forge
 Date: January 18, 2026
 """
 
+import atexit
 import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
+from operator import attrgetter
 
 VERSION = "1.0.0"
 
 # Default Synapse path
 DEFAULT_SYNAPSE_PATH = Path("D:/BEACON_HQ/MEMORY_CORE_V2/03_INTER_AI_COMMS/THE_SYNAPSE/active")
 
+# Load files in parallel only above this count (pool overhead isn't worth it below)
+PARALLEL_LOAD_THRESHOLD = 8
 
-@dataclass
+# Broadcast recipient (interned so comparisons are pointer checks)
+ALL_AGENTS = sys.intern("ALL_AGENTS")
+
+# Memory-map message files larger than this instead of reading them whole
+MMAP_THRESHOLD = 64 * 1024
+
+# Optional fast JSON backend - orjson parses bytes directly and dumps
+# several times faster than the stdlib; fall back silently if missing
+try:
+    import orjson
+    _HAS_ORJSON = True
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_indented(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+except ImportError:
+    _HAS_ORJSON = False
+
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    def _dumps_indented(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+# Optional Aho-Corasick automaton for multi-term search; the regex
+# alternation fallback covers installs without it
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    _HAS_AHOCORASICK = False
+
+
+# A fully saturated per-message bloom mask (matches every query)
+_FULL_BLOOM = (1 << 64) - 1
+
+
+def _trigram_bloom(text: str) -> int:
+    """64-bit Bloom mask over the 3-gram shingles of a lowered string.
+
+    A query can only be a substring if every one of its trigram bits is
+    set, so search() uses this to skip the substring check on misses.
+    hash() is salted per process, but masks and queries are always built
+    in the same process.
+    """
+    mask = 0
+    for i in range(len(text) - 2):
+        mask |= 1 << (hash(text[i:i + 3]) & 63)
+        if mask == _FULL_BLOOM:
+            break  # Saturated - further trigrams can't change it
+    return mask
+
+
+def _timestamp_key(timestamp: str) -> int:
+    """Sort key for an ISO-8601 timestamp: YYYYMMDDHHMMSS as one integer.
+
+    Fixed-width timestamps take a digit-slicing fast path; anything else
+    falls back to datetime.fromisoformat. Unparseable values sort as 0.
+    """
+    if len(timestamp) >= 19:
+        try:
+            return int(timestamp[:4] + timestamp[5:7] + timestamp[8:10] +
+                       timestamp[11:13] + timestamp[14:16] + timestamp[17:19])
+        except ValueError:
+            pass
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError):
+        return 0
+    return (((dt.year * 100 + dt.month) * 100 + dt.day) * 1000000 +
+            dt.hour * 10000 + dt.minute * 100 + dt.second)
+
+
+@dataclass(slots=True)
 class Message:
     """Represents a Synapse message."""
     msg_id: str
     from_agent: str
     to: List[str]
     subject: str
-    body: Dict[str, Any]
     priority: str
     timestamp: str
     filepath: Path
-    
+    ts_key: int = 0  # Timestamp as a YYYYMMDDHHMMSS integer (sort key)
+    search_blob: str = ""  # Pre-lowered subject + body for fast search
+    bloom: int = 0  # Trigram Bloom mask over search_blob
+    body_json: str = ""  # Compact body JSON; decoded lazily via .body
+    _body: Optional[Dict[str, Any]] = None  # Cache for the decoded body
+    _to_str: Optional[str] = None  # Cache for the joined recipient list
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        """Message body, decoded on first access."""
+        if self._body is None:
+            self._body = _loads(self.body_json) if self.body_json else {}
+        return self._body
+
     def __str__(self):
-        return f"{self.from_agent} -> {', '.join(self.to)}: {self.subject} [{self.priority}]"
+        # CLI commands print every message, so join the recipients once
+        if self._to_str is None:
+            self._to_str = ", ".join(self.to)
+        return f"{self.from_agent} -> {self._to_str}: {self.subject} [{self.priority}]"
 
 
 class SynapseInbox:
@@ -66,55 +172,223 @@ class SynapseInbox:
             agent_name: Name of current agent (for filtering)
             synapse_path: Path to THE_SYNAPSE/active folder
         """
-        self.agent_name = agent_name.upper()
+        self.agent_name = sys.intern(agent_name.upper())
         self.synapse_path = synapse_path or DEFAULT_SYNAPSE_PATH
         
         # Read state file (tracks read messages)
         self.state_file = Path.home() / f".synapseinbox_{self.agent_name.lower()}.json"
         self.state = self._load_state()
+
+        # State writes are batched: mutations set the dirty flag and the
+        # state file is written on flush() / context exit / interpreter exit
+        self._dirty = False
+        atexit.register(self._flush_at_exit)
+
+        # Message cache (invalidated when the Synapse folder changes)
+        self._cache: Optional[List[Message]] = None
+        self._cache_dir_mtime: Optional[int] = None
+        self._file_index: Dict[str, tuple] = {}  # path -> (mtime_ns, Message)
+
+        # Default view (to me or broadcast, not archived), precomputed so
+        # no-argument filter() calls skip the per-query set work entirely
+        self._visible_sorted: Optional[List[Message]] = None
+
+        # Compiled multi-term matchers, keyed by the sorted query tuple
+        self._matcher_cache: Dict[tuple, Any] = {}
+
+        # Parallel arrays of search blobs and their Bloom masks, aligned
+        # with the sorted cache, so text scans walk tight lists instead
+        # of chasing Message objects
+        self._blob_arr: List[str] = []
+        self._bloom_arr: List[int] = []
+
+        # Inverted indexes (rebuilt alongside the cache)
+        self._by_id: Dict[str, Message] = {}
+        self._by_from: Dict[str, set] = {}
+        self._by_to: Dict[str, set] = {}
+        self._by_priority: Dict[str, set] = {}
     
     def _load_state(self) -> Dict:
-        """Load inbox state (read messages, etc.)"""
+        """Load inbox state (read messages, etc.)
+
+        Held as sets in memory for O(1) membership; the on-disk JSON
+        format stays as sorted lists.
+        """
+        raw = {}
         if self.state_file.exists():
             try:
-                return json.loads(self.state_file.read_text())
+                raw = _loads(self.state_file.read_bytes())
             except:
-                return {"read_messages": [], "archived": []}
-        return {"read_messages": [], "archived": []}
-    
+                raw = {}
+        return {
+            "read_messages": set(raw.get("read_messages", [])),
+            "archived": set(raw.get("archived", []))
+        }
+
     def _save_state(self):
-        """Save inbox state."""
-        self.state_file.write_text(json.dumps(self.state, indent=2))
+        """Save inbox state (atomic write via rename)."""
+        serializable = {key: sorted(value) for key, value in self.state.items()}
+        tmp_file = self.state_file.with_suffix(".json.tmp")
+        tmp_file.write_text(_dumps_indented(serializable))
+        os.replace(tmp_file, self.state_file)
+        self._dirty = False
+
+    def flush(self):
+        """Write pending state changes to disk."""
+        if self._dirty:
+            self._save_state()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except OSError:
+            pass  # Home dir may be gone at interpreter shutdown
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
     
     def _load_message(self, filepath: Path) -> Optional[Message]:
         """Load a message from file."""
         try:
-            data = json.loads(filepath.read_text(encoding='utf-8'))
+            with open(filepath, 'rb') as f:
+                # Memory-map big files so the parser reads straight from
+                # the page cache instead of a large transient bytes copy
+                # (orjson accepts buffer views; stdlib json does not)
+                if _HAS_ORJSON and os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        view = memoryview(mm)
+                        try:
+                            data = _loads(view)
+                        finally:
+                            view.release()
+                else:
+                    data = _loads(f.read())
+            subject = data.get('subject', '')
+            # Keep the body as a compact JSON string - it doubles as the
+            # search haystack and is only decoded back if .body is accessed
+            body_json = _dumps(data.get('body', {}))
+            # Serialize + lower once here so search() is a plain substring check
+            search_blob = (subject + "\x00" + body_json).lower()
+            # Normalize agent fields to interned upper-case once at load
+            # time so downstream comparisons are pointer-fast
+            to = data.get('to', [])
+            if not isinstance(to, list):
+                to = [to]
+            # Parse the timestamp once so sorting compares integers
+            timestamp = data.get('timestamp', '')
             return Message(
                 msg_id=data.get('msg_id', data.get('message_id', filepath.stem)),
-                from_agent=data.get('from', data.get('from_agent', 'UNKNOWN')),
-                to=data.get('to', []),
-                subject=data.get('subject', ''),
-                body=data.get('body', {}),
-                priority=data.get('priority', 'NORMAL'),
-                timestamp=data.get('timestamp', ''),
-                filepath=filepath
+                from_agent=sys.intern(data.get('from', data.get('from_agent', 'UNKNOWN')).upper()),
+                to=[sys.intern(str(t).upper()) for t in to],
+                subject=subject,
+                priority=sys.intern(data.get('priority', 'NORMAL').upper()),
+                timestamp=timestamp,
+                filepath=filepath,
+                ts_key=_timestamp_key(timestamp),
+                search_blob=search_blob,
+                bloom=_trigram_bloom(search_blob),
+                body_json=body_json
             )
         except Exception as e:
             print(f"Error loading {filepath.name}: {e}")
             return None
     
     def all_messages(self) -> List[Message]:
-        """Get all messages from Synapse."""
-        messages = []
-        for filepath in self.synapse_path.glob("*.json"):
-            msg = self._load_message(filepath)
+        """Get all messages from Synapse (cached until the folder changes)."""
+        try:
+            dir_mtime = self.synapse_path.stat().st_mtime_ns
+        except OSError:
+            dir_mtime = None
+
+        if self._cache is not None and dir_mtime == self._cache_dir_mtime:
+            return list(self._cache)
+
+        self._rebuild_cache(dir_mtime)
+        return list(self._cache)
+
+    def _index_message(self, msg: Message):
+        """Add a message to the inverted indexes."""
+        self._by_id[msg.msg_id] = msg
+        self._by_from.setdefault(msg.from_agent, set()).add(msg.msg_id)
+        for recipient in msg.to:
+            self._by_to.setdefault(recipient, set()).add(msg.msg_id)
+        self._by_priority.setdefault(msg.priority, set()).add(msg.msg_id)
+
+    def _unindex_message(self, msg: Message):
+        """Remove a message from the inverted indexes."""
+        self._by_id.pop(msg.msg_id, None)
+        self._by_from.get(msg.from_agent, set()).discard(msg.msg_id)
+        for recipient in msg.to:
+            self._by_to.get(recipient, set()).discard(msg.msg_id)
+        self._by_priority.get(msg.priority, set()).discard(msg.msg_id)
+
+    def _rebuild_cache(self, dir_mtime: Optional[int]):
+        """Incrementally sync the message cache with the Synapse folder.
+
+        Only new/changed files are parsed and only affected index entries
+        are touched, so the usual "one new message arrived" case does
+        O(delta) work instead of a full rebuild.
+        """
+        seen = set()
+        to_load = []  # (path str, mtime_ns, Path) for files needing a fresh parse
+        changed = False
+        # scandir yields dirent data in batches and caches stat results,
+        # avoiding the per-file stat/open syscalls Path.glob incurs
+        try:
+            with os.scandir(self.synapse_path) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        mtime = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    seen.add(entry.path)
+                    record = self._file_index.get(entry.path)
+                    if record is None or record[0] != mtime:
+                        to_load.append((entry.path, mtime, Path(entry.path)))
+        except OSError:
+            # Missing/unreadable folder means an empty inbox (glob used to
+            # yield nothing here); any cached entries get evicted below
+            pass
+
+        # Cold scans are I/O-bound; overlap the reads with a thread pool
+        if len(to_load) >= PARALLEL_LOAD_THRESHOLD:
+            workers = min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                loaded = list(pool.map(self._load_message,
+                                       (path for _, _, path in to_load)))
+        else:
+            loaded = [self._load_message(path) for _, _, path in to_load]
+
+        for (path, mtime, _), msg in zip(to_load, loaded):
+            old = self._file_index.pop(path, None)
+            if old is not None:
+                self._unindex_message(old[1])
+                changed = True
             if msg:
-                messages.append(msg)
-        
-        # Sort by timestamp (newest first)
-        messages.sort(key=lambda m: m.timestamp, reverse=True)
-        return messages
+                self._file_index[path] = (mtime, msg)
+                self._index_message(msg)
+                changed = True
+
+        # Evict entries for files that disappeared from the folder
+        for path in [p for p in self._file_index if p not in seen]:
+            _, msg = self._file_index.pop(path)
+            self._unindex_message(msg)
+            changed = True
+
+        if changed or self._cache is None:
+            messages = [record[1] for record in self._file_index.values()]
+            # Sort by timestamp (newest first) - integer key, no lambda
+            messages.sort(key=attrgetter('ts_key'), reverse=True)
+            self._cache = messages
+            self._blob_arr = [msg.search_blob for msg in messages]
+            self._bloom_arr = [msg.bloom for msg in messages]
+            self._visible_sorted = None
+        self._cache_dir_mtime = dir_mtime
     
     def filter(self,
                from_agent: Optional[str] = None,
@@ -136,35 +410,54 @@ class SynapseInbox:
             List of matching Message objects
         """
         messages = self.all_messages()
-        results = []
-        
+
+        # Fast path: the no-argument default view is precomputed once per
+        # cache rebuild (and invalidated by archive/unarchive)
+        if (from_agent is None and to_agent is None and priority is None
+                and not unread_only and not include_archived):
+            if self._visible_sorted is None:
+                visible = ((self._by_to.get(self.agent_name, set()) |
+                            self._by_to.get(ALL_AGENTS, set())) -
+                           self.state["archived"])
+                self._visible_sorted = [msg for msg in self._cache
+                                        if msg.msg_id in visible]
+            return list(self._visible_sorted)
+
         # Default to_agent is current agent
         if to_agent is None and not from_agent:
             to_agent = self.agent_name
-        
-        for msg in messages:
-            # Skip archived unless requested
-            if not include_archived and msg.msg_id in self.state.get("archived", []):
-                continue
-            
-            # Apply filters
-            if from_agent and msg.from_agent != from_agent.upper():
-                continue
-            
-            if to_agent:
-                to_list = msg.to if isinstance(msg.to, list) else [msg.to]
-                if to_agent.upper() not in to_list and "ALL_AGENTS" not in to_list:
-                    continue
-            
-            if priority and msg.priority != priority.upper():
-                continue
-            
-            if unread_only and msg.msg_id in self.state.get("read_messages", []):
-                continue
-            
-            results.append(msg)
-        
-        return results
+
+        # Evaluate the query plan once: gather posting lists only for the
+        # criteria actually provided, then intersect starting from the
+        # smallest so candidate sets shrink as fast as possible
+        posting_lists = []
+
+        if from_agent:
+            posting_lists.append(self._by_from.get(from_agent.upper(), set()))
+
+        if to_agent:
+            posting_lists.append(self._by_to.get(to_agent.upper(), set()) |
+                                 self._by_to.get(ALL_AGENTS, set()))
+
+        if priority:
+            posting_lists.append(self._by_priority.get(priority.upper(), set()))
+
+        if posting_lists:
+            posting_lists.sort(key=len)
+            candidates = set(posting_lists[0])
+            for posting_list in posting_lists[1:]:
+                candidates &= posting_list
+        else:
+            candidates = set(self._by_id)
+
+        if not include_archived:
+            candidates -= self.state["archived"]
+
+        if unread_only:
+            candidates -= self.state["read_messages"]
+
+        # Preserve newest-first order from the sorted cache
+        return [msg for msg in messages if msg.msg_id in candidates]
     
     def search(self, query: str, in_body: bool = True) -> List[Message]:
         """
@@ -173,69 +466,140 @@ class SynapseInbox:
         Args:
             query: Search term
             in_body: Also search in message body (not just subject)
-        
+
         Returns:
             List of matching messages
         """
-        messages = self.all_messages()
-        results = []
         query_lower = query.lower()
-        
-        for msg in messages:
-            # Search in subject
-            if query_lower in msg.subject.lower():
-                results.append(msg)
-                continue
-            
-            # Search in body if requested
-            if in_body:
-                body_str = json.dumps(msg.body).lower()
-                if query_lower in body_str:
-                    results.append(msg)
-        
+        self.all_messages()  # Refresh cache/indexes if the folder changed
+
+        # Scan the flat blob array (subject + body, lowered at load time)
+        # and only touch Message objects for the hits; the Bloom mask
+        # rules most misses out before the substring check
+        if in_body:
+            cache = self._cache
+            blooms = self._bloom_arr
+            qmask = _trigram_bloom(query_lower)
+            return [cache[i] for i, blob in enumerate(self._blob_arr)
+                    if (blooms[i] & qmask) == qmask and query_lower in blob]
+
+        return [msg for msg in self._cache
+                if query_lower in msg.subject.lower()]
+
+    def _compile_matcher(self, terms: tuple):
+        """Build (and cache) a single-pass matcher for a set of lowered terms."""
+        matcher = self._matcher_cache.get(terms)
+        if matcher is None:
+            if _HAS_AHOCORASICK:
+                matcher = ahocorasick.Automaton()
+                for term in terms:
+                    matcher.add_word(term, term)
+                matcher.make_automaton()
+            else:
+                matcher = re.compile("|".join(re.escape(t) for t in terms))
+            self._matcher_cache[terms] = matcher
+        return matcher
+
+    def search_many(self, queries: List[str]) -> Dict[str, List[Message]]:
+        """
+        Search for several terms in one pass over each message.
+
+        Args:
+            queries: Search terms
+
+        Returns:
+            Dict mapping each query to its matching messages
+        """
+        self.all_messages()  # Refresh cache/indexes if the folder changed
+        lowered = {query: query.lower() for query in queries}
+        matcher = self._compile_matcher(tuple(sorted(set(lowered.values()))))
+
+        results = {query: [] for query in queries}
+        cache = self._cache
+        if _HAS_AHOCORASICK:
+            for i, blob in enumerate(self._blob_arr):
+                hits = {term for _, term in matcher.iter(blob)}
+                for query, term in lowered.items():
+                    if term in hits:
+                        results[query].append(cache[i])
+        else:
+            # One compiled-regex pass prefilters each blob; only candidate
+            # blobs get the exact per-term check (alternation alone can
+            # miss overlapping matches)
+            for i, blob in enumerate(self._blob_arr):
+                if matcher.search(blob):
+                    for query, term in lowered.items():
+                        if term in blob:
+                            results[query].append(cache[i])
+
         return results
     
     def unread(self, to_me_only: bool = True) -> List[Message]:
-        """Get unread messages."""
-        return self.filter(
-            to_agent=self.agent_name if to_me_only else None,
-            unread_only=True
-        )
+        """Get unread messages (across all recipients if to_me_only=False)."""
+        # Same set arithmetic as unread_count(), so the two always agree
+        unread_ids = (self._unread_candidates(to_me_only) -
+                      self.state["read_messages"] - self.state["archived"])
+        return [msg for msg in self._cache if msg.msg_id in unread_ids]
     
+    def _unread_candidates(self, to_me_only: bool) -> set:
+        """Ids of messages addressed to us (or everyone) for unread checks."""
+        self.all_messages()  # Refresh cache/indexes if the folder changed
+        if to_me_only:
+            return (self._by_to.get(self.agent_name, set()) |
+                    self._by_to.get(ALL_AGENTS, set()))
+        return set(self._by_id)
+
     def unread_count(self, to_me_only: bool = True) -> int:
         """Count unread messages."""
-        return len(self.unread(to_me_only=to_me_only))
+        # Pure set arithmetic on the indexes - no Message list, no sort
+        candidates = self._unread_candidates(to_me_only)
+        return len(candidates - self.state["read_messages"] - self.state["archived"])
+
+    def has_unread(self, to_me_only: bool = True) -> bool:
+        """Check whether any unread messages exist (early-exits on first hit)."""
+        read = self.state["read_messages"]
+        archived = self.state["archived"]
+        return any(msg_id not in read and msg_id not in archived
+                   for msg_id in self._unread_candidates(to_me_only))
     
     def mark_read(self, msg_id: str):
         """Mark message as read."""
-        if msg_id not in self.state.get("read_messages", []):
-            self.state.setdefault("read_messages", []).append(msg_id)
-            self._save_state()
-    
+        if msg_id not in self.state["read_messages"]:
+            self.state["read_messages"].add(msg_id)
+            self._dirty = True
+
     def mark_unread(self, msg_id: str):
         """Mark message as unread."""
-        if msg_id in self.state.get("read_messages", []):
-            self.state["read_messages"].remove(msg_id)
-            self._save_state()
-    
+        if msg_id in self.state["read_messages"]:
+            self.state["read_messages"].discard(msg_id)
+            self._dirty = True
+
+    def bulk_mark_read(self, msg_ids: Iterable[str]):
+        """Mark many messages as read in one state update."""
+        read = self.state["read_messages"]
+        before = len(read)
+        read.update(msg_ids)
+        if len(read) != before:
+            self._dirty = True
+
     def archive(self, msg_id: str):
         """Archive a message (hides from default views)."""
-        if msg_id not in self.state.get("archived", []):
-            self.state.setdefault("archived", []).append(msg_id)
-            self._save_state()
-    
+        if msg_id not in self.state["archived"]:
+            self.state["archived"].add(msg_id)
+            self._dirty = True
+            self._visible_sorted = None
+
     def unarchive(self, msg_id: str):
         """Unarchive a message."""
-        if msg_id in self.state.get("archived", []):
-            self.state["archived"].remove(msg_id)
-            self._save_state()
+        if msg_id in self.state["archived"]:
+            self.state["archived"].discard(msg_id)
+            self._dirty = True
+            self._visible_sorted = None
     
     def get_by_id(self, msg_id: str) -> Optional[Message]:
         """Get specific message by ID."""
-        for msg in self.all_messages():
-            if msg.msg_id == msg_id:
-                return msg
-        return None
+        self.all_messages()  # Refresh cache/indexes if the folder changed
+        return self._by_id.get(msg_id)
 
 
 def main():
@@ -314,7 +678,8 @@ def main():
             return 1
         inbox.archive(args.msg_id)
         print(f"[OK] Archived {args.msg_id}")
-    
+
+    inbox.flush()
     return 0
 
 
@@ -224,7 +224,8 @@ class TestSynapseInbox(unittest.TestCase):
         self.inbox.mark_read("test_001")
         self.inbox.mark_read("test_002")
         self.inbox.archive("test_003")  # Archive unread message
-        
+        self.inbox.flush()  # Writes are batched until flush
+
         # Create new instance
         new_inbox = SynapseInbox(
             agent_name="ATLAS",
@@ -325,6 +326,126 @@ class TestSynapseInbox(unittest.TestCase):
         self.assertIn("[", msg_str)
         self.assertIn("]", msg_str)
 
+    def test_19_incremental_rescan(self):
+        """Test that folder changes are picked up between calls."""
+        self.assertEqual(len(self.inbox.all_messages()), 4)
+
+        # Add a new message after the first scan
+        new_msg = {
+            "msg_id": "test_005",
+            "from": "NOVA",
+            "to": ["ATLAS"],
+            "subject": "Late Arrival",
+            "body": {"content": "New message"},
+            "priority": "NORMAL",
+            "timestamp": "2026-01-18T14:00:00"
+        }
+        (self.test_synapse / "test_005.json").write_text(json.dumps(new_msg))
+
+        messages = self.inbox.all_messages()
+        self.assertEqual(len(messages), 5)
+        self.assertEqual(messages[0].msg_id, "test_005")  # Newest first
+
+        # Delete it again - should be evicted from cache and indexes
+        (self.test_synapse / "test_005.json").unlink()
+        self.assertEqual(len(self.inbox.all_messages()), 4)
+        self.assertIsNone(self.inbox.get_by_id("test_005"))
+
+    def test_20_has_unread(self):
+        """Test has_unread boolean check."""
+        self.assertTrue(self.inbox.has_unread())
+
+        for msg in self.inbox.all_messages():
+            self.inbox.mark_read(msg.msg_id)
+
+        self.assertFalse(self.inbox.has_unread())
+
+    def test_21_batched_state_writes(self):
+        """Test that state writes are batched until flush()."""
+        self.inbox.mark_read("test_001")
+
+        # Nothing on disk yet - a fresh instance sees all messages unread
+        fresh = SynapseInbox(agent_name="ATLAS", synapse_path=self.test_synapse)
+        self.assertEqual(fresh.unread_count(), 4)
+
+        self.inbox.flush()
+        fresh = SynapseInbox(agent_name="ATLAS", synapse_path=self.test_synapse)
+        self.assertEqual(fresh.unread_count(), 3)
+
+    def test_22_bulk_mark_read(self):
+        """Test marking many messages read in one state update."""
+        msg_ids = [m.msg_id for m in self.inbox.all_messages()]
+        self.inbox.bulk_mark_read(msg_ids)
+        self.assertEqual(self.inbox.unread_count(), 0)
+
+    def test_23_context_manager_flushes(self):
+        """Test that the context manager flushes on exit."""
+        with SynapseInbox(agent_name="ATLAS", synapse_path=self.test_synapse) as inbox:
+            inbox.mark_read("test_001")
+
+        fresh = SynapseInbox(agent_name="ATLAS", synapse_path=self.test_synapse)
+        self.assertEqual(fresh.unread_count(), 3)
+
+    def test_24_large_message(self):
+        """Test loading a message with a large body (mmap threshold)."""
+        big_msg = {
+            "msg_id": "test_big",
+            "from": "FORGE",
+            "to": ["ATLAS"],
+            "subject": "Big Payload",
+            "body": {"log": "x" * (128 * 1024), "needle": "haystack"},
+            "priority": "NORMAL",
+            "timestamp": "2026-01-18T15:00:00"
+        }
+        (self.test_synapse / "test_big.json").write_text(json.dumps(big_msg))
+
+        msg = self.inbox.get_by_id("test_big")
+        self.assertIsNotNone(msg)
+        self.assertEqual(msg.body["needle"], "haystack")
+        self.assertEqual(len(self.inbox.search("haystack")), 1)
+
+    def test_25_search_many(self):
+        """Test multi-term search."""
+        results = self.inbox.search_many(["test", "urgent", "nomatch"])
+
+        self.assertGreaterEqual(len(results["test"]), 2)
+        self.assertEqual(len(results["urgent"]), 1)
+        self.assertEqual(results["urgent"][0].msg_id, "test_004")
+        self.assertEqual(results["nomatch"], [])
+
+    def test_26_missing_synapse_folder(self):
+        """Test that a missing Synapse folder behaves as an empty inbox."""
+        inbox = SynapseInbox(
+            agent_name="ATLAS",
+            synapse_path=self.test_synapse / "does_not_exist"
+        )
+        self.assertEqual(inbox.all_messages(), [])
+        self.assertEqual(inbox.unread_count(), 0)
+
+    def test_27_unread_all_recipients(self):
+        """Test that unread() and unread_count() agree for to_me_only=False."""
+        # Message addressed only to another agent
+        other_msg = {
+            "msg_id": "test_other",
+            "from": "FORGE",
+            "to": ["BOLT"],
+            "subject": "Not For Atlas",
+            "body": {"content": "Private"},
+            "priority": "NORMAL",
+            "timestamp": "2026-01-18T16:00:00"
+        }
+        (self.test_synapse / "test_other.json").write_text(json.dumps(other_msg))
+
+        # Not addressed to us: excluded from the to-me view
+        self.assertEqual(len(self.inbox.unread()), 4)
+        self.assertEqual(self.inbox.unread_count(), 4)
+
+        # But included when asking across all recipients
+        all_unread = self.inbox.unread(to_me_only=False)
+        self.assertEqual(len(all_unread), 5)
+        self.assertEqual(self.inbox.unread_count(to_me_only=False), 5)
+        self.assertIn("test_other", [m.msg_id for m in all_unread])
+
 
 def run_tests():
     """Run all tests."""